@@ -0,0 +1,190 @@
+# Daily activity bitmaps: one bit per local day per user
+#
+# Days follow the app's ACTIVITY_TZ (default Asia/Ho_Chi_Minh), so a quiz at
+# 06:00 in Vietnam counts for that morning, not the previous UTC day.
+#
+# A user's row in the activity table holds start_day (days since
+# 1970-01-01, aligned down to a multiple of 8) and a little-endian bit
+# string where bit i means "active on start_day + i". Ten years of history
+# fit in about 460 bytes, and streaks/counts are bit operations on one int.
+#
+# Backfill from existing results, results_daily and progress rows:
+#   python activity.py --db english_app.db --tz Asia/Ho_Chi_Minh
+import argparse
+import datetime
+import sqlite3
+import zoneinfo
+
+import sharding
+
+EPOCH = datetime.date(1970, 1, 1)
+
+DEFAULT_TZ = 'Asia/Ho_Chi_Minh'
+
+# julianday() of 1970-01-01, to turn SQLite dates into day numbers
+SQL_EPOCH_JULIANDAY = 2440587.5
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def day_number(date):
+    return (date - EPOCH).days
+
+
+def day_date(day):
+    return EPOCH + datetime.timedelta(days=day)
+
+
+def today(tz):
+    return day_number(datetime.datetime.now(tz).date())
+
+
+def local_day(timestamp, tz):
+    """Day number in ``tz`` of a UTC timestamp as stored by CURRENT_TIMESTAMP."""
+    moment = datetime.datetime.fromisoformat(timestamp).replace(tzinfo=datetime.timezone.utc)
+    return day_number(moment.astimezone(tz).date())
+
+
+def set_days(start_day, bits, days):
+    """Return ``(start_day, bits)`` with ``days`` marked, or None if already marked."""
+    value = int.from_bytes(bits or b'', 'little')
+    first = min(days)
+    if start_day is None:
+        start_day = first - first % 8
+    elif first < start_day:
+        # Prepend whole bytes so start_day stays aligned
+        new_start = first - first % 8
+        value <<= start_day - new_start
+        start_day = new_start
+
+    marked = value
+    for day in days:
+        marked |= 1 << (day - start_day)
+    if bits is not None and marked == value:
+        return None
+    return start_day, marked.to_bytes((marked.bit_length() + 7) // 8, 'little')
+
+
+def _count(value, start_day, first, last):
+    # Active days in [first, last]
+    low = max(first - start_day, 0)
+    high = last - start_day + 1
+    if high <= low:
+        return 0
+    return bin((value >> low) & ((1 << (high - low)) - 1)).count('1')
+
+
+def summarize(start_day, bits, today, window=365):
+    """Streaks, monthly counts and a heatmap (active dates) for the last ``window`` days."""
+    value = int.from_bytes(bits or b'', 'little')
+    if start_day is None:
+        start_day = today
+
+    # Current streak: today may still be empty without breaking yesterday's run
+    position = today - start_day
+    if position >= 0 and not (value >> position) & 1:
+        position -= 1
+    current_streak = 0
+    if position >= 0:
+        mask = (1 << (position + 1)) - 1
+        gaps = ~value & mask
+        current_streak = position + 1 - gaps.bit_length()
+
+    # Longest run of set bits: each step shortens every run by one
+    longest_streak = 0
+    runs = value
+    while runs:
+        runs &= runs >> 1
+        longest_streak += 1
+
+    today_date = day_date(today)
+    month_start = day_number(today_date.replace(day=1))
+    first = today - window + 1
+
+    heatmap = []
+    monthly = {}
+    for day in range(max(first, start_day), today + 1):
+        if (value >> (day - start_day)) & 1:
+            date = day_date(day)
+            heatmap.append(date.isoformat())
+            month = date.strftime('%Y-%m')
+            monthly[month] = monthly.get(month, 0) + 1
+
+    return {
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'total_days_active': bin(value).count('1'),
+        'days_active_this_month': _count(value, start_day, month_start, today),
+        'monthly': monthly,
+        'heatmap': heatmap
+    }
+
+
+def mark_days(cursor, user_id, days):
+    """Set ``days`` for ``user_id`` inside the caller's transaction; return False if nothing changed."""
+    cursor.execute("SELECT start_day, bits FROM activity WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone() or (None, None)
+    updated = set_days(row[0], row[1], days)
+    if updated is None:
+        return False
+    cursor.execute("INSERT OR REPLACE INTO activity (user_id, start_day, bits) VALUES (?, ?, ?)",
+                   (user_id,) + updated)
+    return True
+
+
+def backfill_file(path, tz):
+    """OR every day with results, rollups or reviews into the bitmaps in ``path``."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute(sharding.USER_DATA_TABLES['activity'])
+
+    days_by_user = {}
+    # Timestamps are UTC; convert in Python so DST zones are handled too
+    cursor.execute("""
+        SELECT DISTINCT user_id, completed_at FROM results
+        WHERE user_id IS NOT NULL AND completed_at IS NOT NULL
+        UNION
+        SELECT DISTINCT user_id, last_reviewed FROM progress
+        WHERE user_id IS NOT NULL AND last_reviewed IS NOT NULL
+    """)
+    for user_id, timestamp in cursor.fetchall():
+        days_by_user.setdefault(user_id, set()).add(local_day(timestamp, tz))
+    # Rollups only keep the (UTC) date, so those days are taken as they are
+    cursor.execute("SELECT DISTINCT user_id, CAST(julianday(day) - ? AS INTEGER) FROM results_daily",
+                   (SQL_EPOCH_JULIANDAY,))
+    for user_id, day in cursor.fetchall():
+        days_by_user.setdefault(user_id, set()).add(day)
+
+    users = sorted(days_by_user)
+    updated = 0
+    for i in range(0, len(users), BACKFILL_BATCH_SIZE):
+        # Take the write lock before reading a bitmap so a concurrent
+        # Quiz.submit_result cannot set a bit between our read and write
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for user_id in users[i:i + BACKFILL_BATCH_SIZE]:
+                if mark_days(cursor, user_id, sorted(days_by_user[user_id])):
+                    updated += 1
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            conn.close()
+            raise
+
+    conn.close()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build activity bitmaps from existing results')
+    parser.add_argument('--db', default='english_app.db')
+    parser.add_argument('--tz', default=DEFAULT_TZ, help='time zone that days are counted in (ACTIVITY_TZ)')
+    args = parser.parse_args()
+
+    tz = zoneinfo.ZoneInfo(args.tz)
+    for path in sharding.user_data_paths(args.db):
+        print('%s: %d users updated' % (path, backfill_file(path, tz)))
+
+
+if __name__ == '__main__':
+    main()
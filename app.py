@@ -1,25 +1,115 @@
-from flask import Flask, request, jsonify, render_template, session
+from flask import Blueprint, Flask, current_app, g, request, jsonify, render_template, session
 from flask_cors import CORS
 import sqlite3
 import hashlib
-import jwt
 import datetime
+from contextlib import contextmanager
 from functools import wraps
 import os
+import threading
+import time
+import zoneinfo
+from concurrent.futures import ThreadPoolExecutor
+from rate_limit import AdmissionController, admit
+from compression import CompressionCache, compressed_json
+import sharding
+import activity
 
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'
-CORS(app)
+try:
+    import fcntl
+except ImportError:  # Windows: bootstrap is still idempotent, just not serialized
+    fcntl = None
+
+# Bump when init_database changes so existing files are migrated once
+SCHEMA_VERSION = 2
+
+@contextmanager
+def file_lock(path):
+    with open(path, 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
 # Database Models (OOP approach)
 class Database:
-    def __init__(self, db_name='english_app.db'):
+    def __init__(self, db_name='english_app.db', shards=0):
         self.db_name = db_name
-        self.init_database()
+        self.shards = shards
+        self._catalog = None
+        self._lock = threading.Lock()
+        self.bootstrap()
     
     def get_connection(self):
         return sqlite3.connect(self.db_name)
     
+    @property
+    def catalog(self):
+        # Loaded on first catalog read, so write-only processes never pay for it
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = Catalog(self)
+        return self._catalog
+    
+    def bootstrap(self):
+        """Create schema, shards and sample data once per database file.
+        
+        ``PRAGMA user_version`` marks a bootstrapped file, so later starts cost
+        one read. A file lock keeps parallel workers from seeding twice.
+        """
+        if self._schema_version() >= SCHEMA_VERSION:
+            conn = self.get_connection()
+            sharding.check_layout(conn, self.shards, self.db_name)
+            conn.close()
+            return
+        
+        with file_lock(self.db_name + '.lock'):
+            if self._schema_version() < SCHEMA_VERSION:
+                self.init_database()
+                conn = self.get_connection()
+                conn.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+                conn.close()
+            else:
+                conn = self.get_connection()
+                sharding.check_layout(conn, self.shards, self.db_name)
+                conn.close()
+    
+    def _schema_version(self):
+        conn = self.get_connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        return version
+    
+    # progress/results live in the main file, or in one shard per user_id
+    def get_user_connection(self, user_id):
+        if not self.shards:
+            return self.get_connection()
+        index = sharding.shard_index(user_id, self.shards)
+        return sqlite3.connect(sharding.shard_path(self.db_name, index, self.shards))
+    
+    def get_user_paths(self):
+        if not self.shards:
+            return [self.db_name]
+        return sharding.layout_paths(self.db_name, self.shards)
+    
+    def fan_out(self, query, params=()):
+        """Run a read query on every user-data shard in parallel; one row list per shard."""
+        def run(path):
+            conn = sqlite3.connect(path)
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        
+        paths = self.get_user_paths()
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            return list(pool.map(run, paths))
+    
     def init_database(self):
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -102,9 +192,59 @@ class Database:
             )
         ''')
         
+        # Daily rollups of compacted results (see compaction.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS results_daily (
+                user_id INTEGER NOT NULL,
+                topic_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                quiz_count INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                question_sum INTEGER NOT NULL,
+                PRIMARY KEY (user_id, topic_id, day),
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Activity bitmaps: one bit per local (ACTIVITY_TZ) day (see activity.py)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS activity (
+                user_id INTEGER PRIMARY KEY,
+                start_day INTEGER NOT NULL,
+                bits BLOB NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        # Catalog versions: one row per topic, bumped by triggers on every
+        # catalog edit so other processes can tell which topics changed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS catalog_versions (
+                topic_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        
+        for table, column in (('topics', 'id'), ('vocabularies', 'topic_id'), ('quizzes', 'topic_id')):
+            for event, rows in (('INSERT', ('NEW',)), ('UPDATE', ('OLD', 'NEW')), ('DELETE', ('OLD',))):
+                # A NULL topic_id would otherwise get a made-up rowid
+                bumps = ''.join('''
+                    INSERT INTO catalog_versions (topic_id, version) SELECT %s.%s, 1 WHERE %s.%s IS NOT NULL
+                    ON CONFLICT (topic_id) DO UPDATE SET version = version + 1;''' % (row, column, row, column)
+                    for row in rows)
+                cursor.execute('''
+                    CREATE TRIGGER IF NOT EXISTS %s_%s_version AFTER %s ON %s
+                    BEGIN%s
+                    END
+                ''' % (table, event.lower(), event, table, bumps))
+        
         conn.commit()
+        sharding.check_layout(conn, self.shards, self.db_name)
         conn.close()
         
+        for path in sharding.layout_paths(self.db_name, self.shards):
+            sharding.init_shard(path)
+        
         # Insert sample data
         self.insert_sample_data()
     
@@ -161,9 +301,143 @@ class Database:
         conn.commit()
         conn.close()
 
+class Catalog:
+    """In-memory copy of topics, vocabularies and quizzes.
+
+    Loaded once per process (before fork when the app is preloaded, so
+    workers share it copy-on-write). ``refresh`` polls ``PRAGMA data_version``
+    and reloads only the topics whose ``catalog_versions`` row changed.
+    """
+    
+    def __init__(self, db, poll_interval=1.0):
+        self.db = db
+        self.poll_interval = poll_interval
+        self.topics = []
+        self.topics_by_id = {}
+        self.vocabularies = {}
+        self.quizzes = {}
+        self.versions = {}
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._data_version = None
+        self._checked_at = 0.0
+        self.load()
+    
+    def load(self):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM topics")
+        topic_ids = {row[0] for row in cursor.fetchall()}
+        cursor.execute("SELECT topic_id, version FROM catalog_versions")
+        self.versions = dict(cursor.fetchall())
+        self._reload_topics(cursor, topic_ids)
+        conn.close()
+    
+    def refresh(self):
+        if time.monotonic() - self._checked_at < self.poll_interval:
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.poll_interval:
+                return
+            self._checked_at = now
+            
+            conn = self._poll_connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            self._data_version = data_version
+            
+            # Read versions and changed topics from one snapshot
+            cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute("SELECT topic_id, version FROM catalog_versions")
+                versions = dict(cursor.fetchall())
+                changed = {topic_id for topic_id in set(versions) | set(self.versions)
+                           if versions.get(topic_id, 0) != self.versions.get(topic_id, 0)}
+                if changed:
+                    self._reload_topics(cursor, changed)
+                self.versions = versions
+            finally:
+                cursor.execute("COMMIT")
+    
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._data_version = None
+    
+    def _poll_connection(self):
+        # SQLite connections must not cross fork(); data_version values are
+        # per connection, so a fresh one always compares catalog_versions
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db.db_name, isolation_level=None, check_same_thread=False)
+            self._pid = os.getpid()
+            self._data_version = None
+        return self._conn
+    
+    def _reload_topics(self, cursor, topic_ids):
+        # Build new containers and swap them in so readers never see a partial update
+        topics_by_id = dict(self.topics_by_id)
+        vocabularies = dict(self.vocabularies)
+        quizzes = dict(self.quizzes)
+        
+        for topic_id in topic_ids:
+            cursor.execute("SELECT * FROM topics WHERE id = ?", (topic_id,))
+            topic = cursor.fetchone()
+            if topic is None:
+                topics_by_id.pop(topic_id, None)
+                vocabularies.pop(topic_id, None)
+                quizzes.pop(topic_id, None)
+                continue
+            
+            topics_by_id[topic_id] = {'id': topic[0], 'name': topic[1], 'level': topic[2], 'description': topic[3]}
+            
+            cursor.execute("SELECT * FROM vocabularies WHERE topic_id = ?", (topic_id,))
+            vocabularies[topic_id] = [{
+                'id': v[0],
+                'word': v[1],
+                'meaning': v[2],
+                'example': v[3],
+                'pronunciation': v[4],
+                'topic_id': v[5]
+            } for v in cursor.fetchall()]
+            
+            cursor.execute("SELECT * FROM quizzes WHERE topic_id = ?", (topic_id,))
+            quizzes[topic_id] = [{
+                'id': q[0],
+                'topic_id': q[1],
+                'question': q[2],
+                'options': {
+                    'A': q[3],
+                    'B': q[4],
+                    'C': q[5],
+                    'D': q[6]
+                },
+                'correct_answer': q[7]
+            } for q in cursor.fetchall()]
+        
+        self.topics_by_id = topics_by_id
+        self.vocabularies = vocabularies
+        self.quizzes = quizzes
+        self.topics = [topics_by_id[topic_id] for topic_id in sorted(topics_by_id)]
+        self.generation += 1
+    
+    def cache_key(self, kind, topic_id=None):
+        """Key that changes whenever the data behind a catalog response does."""
+        self.refresh()
+        if topic_id is None:
+            return (kind, self.generation)
+        return (kind, topic_id, self.versions.get(topic_id, 0))
+
 class User:
-    def __init__(self, db):
+    def __init__(self, db, secret_key):
         self.db = db
+        self.secret_key = secret_key
     
     def register(self, username, email, password):
         conn = self.db.get_connection()
@@ -192,12 +466,13 @@ class User:
         conn.close()
         
         if user:
+            import jwt
             token = jwt.encode({
                 'user_id': user[0],
                 'username': user[1],
                 'role': user[3],
                 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-            }, app.secret_key, algorithm='HS256')
+            }, self.secret_key, algorithm='HS256')
             
             return {
                 'success': True,
@@ -216,71 +491,32 @@ class Topic:
         self.db = db
     
     def get_all(self):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM topics")
-        topics = cursor.fetchall()
-        conn.close()
-        
-        return [{'id': t[0], 'name': t[1], 'level': t[2], 'description': t[3]} for t in topics]
+        self.db.catalog.refresh()
+        return self.db.catalog.topics
     
     def get_by_id(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM topics WHERE id = ?", (topic_id,))
-        topic = cursor.fetchone()
-        conn.close()
-        
-        if topic:
-            return {'id': topic[0], 'name': topic[1], 'level': topic[2], 'description': topic[3]}
-        return None
+        self.db.catalog.refresh()
+        return self.db.catalog.topics_by_id.get(topic_id)
 
 class Vocabulary:
     def __init__(self, db):
         self.db = db
     
     def get_by_topic(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM vocabularies WHERE topic_id = ?", (topic_id,))
-        vocabularies = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            'id': v[0],
-            'word': v[1],
-            'meaning': v[2],
-            'example': v[3],
-            'pronunciation': v[4],
-            'topic_id': v[5]
-        } for v in vocabularies]
+        self.db.catalog.refresh()
+        return self.db.catalog.vocabularies.get(topic_id, [])
 
 class Quiz:
-    def __init__(self, db):
+    def __init__(self, db, tz):
         self.db = db
+        self.tz = tz
     
     def get_by_topic(self, topic_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM quizzes WHERE topic_id = ?", (topic_id,))
-        quizzes = cursor.fetchall()
-        conn.close()
-        
-        return [{
-            'id': q[0],
-            'topic_id': q[1],
-            'question': q[2],
-            'options': {
-                'A': q[3],
-                'B': q[4],
-                'C': q[5],
-                'D': q[6]
-            },
-            'correct_answer': q[7]
-        } for q in quizzes]
+        self.db.catalog.refresh()
+        return self.db.catalog.quizzes.get(topic_id, [])
     
     def submit_result(self, user_id, quiz_results):
-        conn = self.db.get_connection()
+        conn = self.db.get_user_connection(user_id)
         cursor = conn.cursor()
         
         total_questions = len(quiz_results)
@@ -289,102 +525,262 @@ class Quiz:
         
         cursor.execute("INSERT INTO results (user_id, quiz_id, score, total_questions) VALUES (?, ?, ?, ?)",
                       (user_id, quiz_results[0]['quiz_id'], score, total_questions))
+        activity.mark_days(cursor, user_id, [activity.today(self.tz)])
         
         conn.commit()
         conn.close()
         
         return {'score': score, 'correct': correct_answers, 'total': total_questions}
 
-# Initialize database and models
-db = Database()
-user_model = User(db)
-topic_model = Topic(db)
-vocabulary_model = Vocabulary(db)
-quiz_model = Quiz(db)
+class Progress:
+    def __init__(self, db):
+        self.db = db
+    
+    # Quiz statistics read live results plus the daily rollups that
+    # compaction.py leaves behind for older results
+    def get_stats(self, user_id):
+        conn = self.db.get_user_connection(user_id)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 
+                (SELECT COUNT(DISTINCT vocab_id) FROM progress WHERE user_id = ?) as learned_words,
+                SUM(quiz_count) as quizzes_taken,
+                SUM(score_sum) as score_sum
+            FROM (
+                SELECT COUNT(*) as quiz_count, SUM(score) as score_sum FROM results WHERE user_id = ?
+                UNION ALL
+                SELECT SUM(quiz_count), SUM(score_sum) FROM results_daily WHERE user_id = ?
+            )
+        """, (user_id, user_id, user_id))
+        stats = cursor.fetchone()
+        conn.close()
+        
+        quizzes_taken = stats[1] or 0
+        return {
+            'learned_words': stats[0] or 0,
+            'average_score': round(stats[2] / quizzes_taken, 2) if quizzes_taken else 0,
+            'quizzes_taken': quizzes_taken
+        }
+    
+    def get_overview(self):
+        # Users never span shards, so per-shard counts add up exactly
+        shards = self.db.fan_out("""
+            SELECT 
+                SUM(quiz_count),
+                SUM(score_sum),
+                (SELECT COUNT(*) FROM (
+                    SELECT user_id FROM results WHERE user_id IS NOT NULL
+                    UNION
+                    SELECT user_id FROM results_daily
+                ))
+            FROM (
+                SELECT COUNT(*) as quiz_count, SUM(score) as score_sum FROM results
+                UNION ALL
+                SELECT SUM(quiz_count), SUM(score_sum) FROM results_daily
+            )
+        """)
+        quizzes_taken = sum(rows[0][0] or 0 for rows in shards)
+        score_sum = sum(rows[0][1] or 0 for rows in shards)
+        
+        return {
+            'quizzes_taken': quizzes_taken,
+            'average_score': round(score_sum / quizzes_taken, 2) if quizzes_taken else 0,
+            'active_users': sum(rows[0][2] for rows in shards),
+            'shards': len(shards)
+        }
+
+class Activity:
+    def __init__(self, db, tz):
+        self.db = db
+        self.tz = tz
+    
+    def get_summary(self, user_id, window=365):
+        conn = self.db.get_user_connection(user_id)
+        cursor = conn.cursor()
+        cursor.execute("SELECT start_day, bits FROM activity WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone() or (None, None)
+        conn.close()
+        
+        return activity.summarize(row[0], row[1], activity.today(self.tz), window)
+
+class Models:
+    """Database and models for one app, built on first use (see get_models)."""
+    
+    def __init__(self, config):
+        self.db = Database(config['DATABASE'], config['DB_SHARDS'])
+        tz = zoneinfo.ZoneInfo(config['ACTIVITY_TZ'])
+        self.user = User(self.db, config['SECRET_KEY'])
+        self.topic = Topic(self.db)
+        self.vocabulary = Vocabulary(self.db)
+        self.quiz = Quiz(self.db, tz)
+        self.progress = Progress(self.db)
+        self.activity = Activity(self.db, tz)
+
+def get_models():
+    state = current_app.extensions['english_app']
+    if state['models'] is None:
+        with state['lock']:
+            if state['models'] is None:
+                state['models'] = Models(current_app.config)
+    return state['models']
 
 # Authentication decorator
+def token_payload():
+    """Decoded JWT from the Authorization header, or None; decoded once per request."""
+    if 'token_payload' not in g:
+        g.token_payload = None
+        token = request.headers.get('Authorization')
+        if token:
+            import jwt
+            if token.startswith('Bearer '):
+                token = token[7:]
+            try:
+                g.token_payload = jwt.decode(token, current_app.secret_key, algorithms=['HS256'])
+            except Exception:
+                pass
+    return g.token_payload
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
+        if not request.headers.get('Authorization'):
             return jsonify({'message': 'Token is missing'}), 401
         
-        try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, app.secret_key, algorithms=['HS256'])
-            current_user = data
-        except:
+        current_user = token_payload()
+        if current_user is None:
             return jsonify({'message': 'Token is invalid'}), 401
         
         return f(current_user, *args, **kwargs)
     return decorated
 
+# Admission control: rate limit per user (or per IP when anonymous).
+# Runs before token_required, which reuses the payload decoded here.
+def client_key():
+    data = token_payload()
+    if data is not None and 'user_id' in data:
+        return 'user', data['user_id']
+    return 'ip', request.remote_addr
+
+# Route class -> (concurrent requests, queued requests, queue wait in seconds).
+# Limits are per process and sized from its request threads (gunicorn's
+# `threads`): running plus queued requests of one class never occupy every
+# thread, so an overloaded worker answers 503 instead of stalling.
+def route_classes(threads):
+    return {
+        'read': (max(threads // 2, 1), max(threads // 4, 1), 0.5),
+        'write': (max(threads // 4, 1), max(threads // 8, 1), 1.0),
+        'auth': (max(threads // 8, 1), max(threads // 8, 1), 1.0),
+    }
+
 # Routes
-@app.route('/')
+api = Blueprint('api', __name__)
+
+@api.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/api/register', methods=['POST'])
+@api.route('/api/register', methods=['POST'])
+@admit('auth')
 def register():
     data = request.get_json()
-    result = user_model.register(data['username'], data['email'], data['password'])
+    result = get_models().user.register(data['username'], data['email'], data['password'])
     return jsonify(result)
 
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
+@admit('auth')
 def login():
     data = request.get_json()
-    result = user_model.login(data['username'], data['password'])
+    result = get_models().user.login(data['username'], data['password'])
     return jsonify(result)
 
-@app.route('/api/topics', methods=['GET'])
+@api.route('/api/topics', methods=['GET'])
+@admit('read')
 def get_topics():
-    topics = topic_model.get_all()
-    return jsonify(topics)
+    models = get_models()
+    return compressed_json(models.db.catalog.cache_key('topics'), models.topic.get_all)
 
-@app.route('/api/topics/<int:topic_id>/vocabularies', methods=['GET'])
+@api.route('/api/topics/<int:topic_id>/vocabularies', methods=['GET'])
+@admit('read')
 def get_vocabularies(topic_id):
-    vocabularies = vocabulary_model.get_by_topic(topic_id)
-    return jsonify(vocabularies)
+    models = get_models()
+    return compressed_json(models.db.catalog.cache_key('vocabularies', topic_id),
+                           lambda: models.vocabulary.get_by_topic(topic_id))
 
-@app.route('/api/topics/<int:topic_id>/quiz', methods=['GET'])
+@api.route('/api/topics/<int:topic_id>/quiz', methods=['GET'])
+@admit('read')
 def get_quiz(topic_id):
-    quiz_questions = quiz_model.get_by_topic(topic_id)
-    return jsonify(quiz_questions)
+    models = get_models()
+    return compressed_json(models.db.catalog.cache_key('quiz', topic_id),
+                           lambda: models.quiz.get_by_topic(topic_id))
 
-@app.route('/api/quiz/submit', methods=['POST'])
+@api.route('/api/quiz/submit', methods=['POST'])
+@admit('write')
 @token_required
 def submit_quiz(current_user):
     data = request.get_json()
-    result = quiz_model.submit_result(current_user['user_id'], data['results'])
+    result = get_models().quiz.submit_result(current_user['user_id'], data['results'])
     return jsonify(result)
 
-@app.route('/api/progress', methods=['GET'])
+@api.route('/api/progress', methods=['GET'])
+@admit('read')
 @token_required
 def get_progress(current_user):
-    conn = db.get_connection()
-    cursor = conn.cursor()
+    stats = get_models().progress.get_stats(current_user['user_id'])
+    return jsonify(stats)
+
+@api.route('/api/activity', methods=['GET'])
+@admit('read')
+@token_required
+def get_activity(current_user):
+    days = min(max(request.args.get('days', 365, type=int), 1), 3660)
+    summary = get_models().activity.get_summary(current_user['user_id'], days)
+    return jsonify(summary)
+
+@api.route('/api/admin/stats', methods=['GET'])
+@admit('read')
+@token_required
+def get_admin_stats(current_user):
+    if current_user.get('role') != 'admin':
+        return jsonify({'message': 'Admin only'}), 403
     
-    # Get user's learning statistics
-    cursor.execute("""
-        SELECT 
-            COUNT(DISTINCT p.vocab_id) as learned_words,
-            AVG(r.score) as avg_score,
-            COUNT(DISTINCT r.id) as quizzes_taken
-        FROM progress p
-        LEFT JOIN results r ON r.user_id = p.user_id
-        WHERE p.user_id = ?
-    """, (current_user['user_id'],))
+    return jsonify(get_models().progress.get_overview())
+
+def init_db_command():
+    """Create the schema and sample data (flask --app app init-db)."""
+    get_models()
+    print('Database ready: %s' % current_app.config['DATABASE'])
+
+# Application factory
+def create_app(config=None):
+    """Build the Flask app. Nothing touches the database until first use."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='your-secret-key-here',
+        DATABASE='english_app.db',
+        DB_SHARDS=int(os.environ.get('DB_SHARDS', '0')),
+        ADMISSION_CONTROL=os.environ.get('ADMISSION_CONTROL', '1') != '0',
+        REQUEST_THREADS=int(os.environ.get('WEB_THREADS', '16')),
+        ACTIVITY_TZ=os.environ.get('ACTIVITY_TZ', activity.DEFAULT_TZ),
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_CACHE_SIZE=256,
+    )
+    if config:
+        app.config.update(config)
+    # Send Vietnamese text as UTF-8 (3 bytes) instead of \uXXXX escapes (6 bytes)
+    app.json.ensure_ascii = False
+    CORS(app)
     
-    stats = cursor.fetchone()
-    conn.close()
+    app.extensions['english_app'] = {'models': None, 'lock': threading.Lock()}
+    admission = AdmissionController(client_key, route_classes(app.config['REQUEST_THREADS']))
+    admission.enabled = app.config['ADMISSION_CONTROL']
+    admission.init_app(app)
+    CompressionCache(app.config['COMPRESS_CACHE_SIZE']).init_app(app)
     
-    return jsonify({
-        'learned_words': stats[0] or 0,
-        'average_score': round(stats[1] or 0, 2),
-        'quizzes_taken': stats[2] or 0
-    })
+    app.register_blueprint(api)
+    app.cli.command('init-db')(init_db_command)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,112 @@
+# Load test for admission control: latency of served requests under overload
+#
+#   python benchmarks/bench_admission.py --clients 128 --duration 10
+#
+# Runs the Flask app on a threaded local server in a scratch directory and
+# hammers it with a read/write mix, once with admission control disabled and
+# once enabled. Rate limits are widened so only the concurrency limits shed.
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def request(port, method, path, body=None, token=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = 'Bearer ' + token
+    conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def run_load(port, token, clients, duration):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    submission = {'results': [{'quiz_id': 1, 'is_correct': True}, {'quiz_id': 2, 'is_correct': False}]}
+
+    def worker(n):
+        i = 0
+        while time.monotonic() < deadline:
+            i += 1
+            start = time.perf_counter()
+            try:
+                if (n + i) % 4 == 0:
+                    status, _ = request(port, 'POST', '/api/quiz/submit', submission, token)
+                else:
+                    status, _ = request(port, 'GET', '/api/topics/%d/vocabularies' % (i % 4 + 1))
+            except OSError:
+                status = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=128)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from werkzeug.serving import make_server
+    import app as app_module
+    from rate_limit import RateLimiter
+
+    admission = app_module.app.extensions['admission']
+    admission.limiters = {'user': RateLimiter(1e9, 1e9), 'ip': RateLimiter(1e9, 1e9)}
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    _, body = request(port, 'POST', '/api/login', {'username': 'admin', 'password': 'admin123'})
+    token = json.loads(body)['token']
+
+    print('clients=%d duration=%.0fs' % (args.clients, args.duration))
+    for enabled in (False, True):
+        admission.enabled = enabled
+        latencies, statuses = run_load(port, token, args.clients, args.duration)
+        print('admission=%-5s served/s=%7.1f p50=%6.1fms p99=%7.1fms statuses=%s' % (
+            'on' if enabled else 'off',
+            len(latencies) / args.duration,
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000,
+            dict(sorted(statuses.items(), key=str)),
+        ))
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# DB size and progress query time before and after results compaction
+#
+#   python benchmarks/bench_compaction.py --users 500 --results 200000 --days 30
+#
+# Fills a scratch database with a year of quiz results, times
+# Progress.get_stats / get_overview, compacts with VACUUM, then times them
+# again and checks every user's statistics are unchanged.
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def file_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+
+def time_queries(progress_model, users, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for user_id in users:
+            progress_model.get_stats(user_id)
+    per_user = (time.perf_counter() - start) / (repeat * len(users))
+
+    start = time.perf_counter()
+    progress_model.get_overview()
+    overview = time.perf_counter() - start
+    return per_user, overview
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--results', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=30, help='retention window')
+    parser.add_argument('--sample', type=int, default=100, help='users timed for get_stats')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    import app as app_module
+    import compaction
+
+    with app_module.app.app_context():
+        db = app_module.get_models().db
+    progress_model = app_module.Progress(db)
+
+    rng = random.Random(42)
+    now = datetime.datetime.utcnow()
+    rows = []
+    # Study sessions: a user takes a few quizzes from one topic in a row
+    while len(rows) < args.results:
+        user_id = rng.randint(1, args.users)
+        quiz_id = rng.randint(1, 4)
+        started = now - datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+        for i in range(rng.randint(3, 10)):
+            completed_at = started + datetime.timedelta(minutes=2 * i)
+            rows.append((user_id, quiz_id, rng.choice([0, 50, 100]), 2,
+                         completed_at.strftime('%Y-%m-%d %H:%M:%S')))
+    rows.sort(key=lambda row: row[4])
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO results (user_id, quiz_id, score, total_questions, completed_at) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+    users = list(range(1, args.users + 1))
+    sample = rng.sample(users, min(args.sample, len(users)))
+    before = {user_id: progress_model.get_stats(user_id) for user_id in users}
+    overview_before = progress_model.get_overview()
+    size_before = file_size(db.db_name)
+    stats_time, overview_time = time_queries(progress_model, sample, 5)
+    print('before: db=%8.0f kB get_stats=%7.3f ms overview=%7.2f ms' % (
+        size_before / 1024, stats_time * 1000, overview_time * 1000))
+
+    start = time.perf_counter()
+    moved = compaction.compact(db.db_name, days=args.days, vacuum=True)
+    elapsed = time.perf_counter() - start
+
+    size_after = file_size(db.db_name)
+    archive_size = file_size(compaction.archive_path(db.db_name))
+    stats_time, overview_time = time_queries(progress_model, sample, 5)
+    print('after:  db=%8.0f kB get_stats=%7.3f ms overview=%7.2f ms archive=%.0f kB' % (
+        size_after / 1024, stats_time * 1000, overview_time * 1000, archive_size / 1024))
+    print('compacted %d rows in %.2fs' % (sum(moved.values()), elapsed))
+
+    after = {user_id: progress_model.get_stats(user_id) for user_id in users}
+    assert before == after, 'per-user statistics changed'
+    assert overview_before == progress_model.get_overview(), 'overview changed'
+    print('statistics unchanged for %d users' % len(users))
+
+
+if __name__ == '__main__':
+    main()
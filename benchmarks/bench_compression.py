@@ -0,0 +1,75 @@
+# Bytes on the wire and CPU per request for catalog responses
+#
+#   python benchmarks/bench_compression.py --words 300 --requests 200
+#
+# Seeds a scratch database with a larger vocabulary (long examples with
+# Vietnamese text), then requests /api/topics/1/vocabularies through the
+# test client for each Accept-Encoding, with the precompressed cache on and
+# off (COMPRESS_CACHE_SIZE=0 re-serializes and re-compresses every time).
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MEANINGS = ['gia đình', 'du lịch', 'công việc', 'máy tính', 'học tập', 'thời tiết', 'sức khỏe', 'nhà hàng']
+
+
+def seed(app_module, words):
+    app = app_module.create_app({'ADMISSION_CONTROL': False})
+    with app.app_context():
+        db = app_module.get_models().db
+    rng = random.Random(1)
+    rows = []
+    for i in range(words):
+        meaning = rng.choice(MEANINGS)
+        rows.append(('word%d' % i, meaning,
+                     'This is a longer example sentence number %d about %s, nghĩa là "%s" trong tiếng Việt.'
+                     % (i, rng.choice(MEANINGS), meaning),
+                     '/wɜːd%d/' % i, 1))
+    conn = db.get_connection()
+    conn.executemany("INSERT INTO vocabularies (word, meaning, example, pronunciation, topic_id) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def measure(app_module, cache_size, accept_encoding, requests):
+    app = app_module.create_app({'ADMISSION_CONTROL': False, 'COMPRESS_CACHE_SIZE': cache_size})
+    client = app.test_client()
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    response = client.get('/api/topics/1/vocabularies', headers=headers)
+
+    start = time.process_time()
+    for _ in range(requests):
+        client.get('/api/topics/1/vocabularies', headers=headers)
+    cpu = (time.process_time() - start) / requests
+    return response.headers.get('Content-Encoding') or 'identity', len(response.data), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    import app as app_module
+    import compression
+
+    seed(app_module, args.words)
+    print('available encodings: %s' % ', '.join(sorted(compression.COMPRESSORS)))
+    for accept_encoding in ('', 'gzip', 'br', 'zstd'):
+        if accept_encoding and accept_encoding not in compression.COMPRESSORS:
+            continue
+        for cache_size in (0, 256):
+            encoding, size, cpu = measure(app_module, cache_size, accept_encoding, args.requests)
+            print('%-8s cache=%-3s bytes=%7d cpu/request=%7.3f ms' % (
+                encoding, 'on' if cache_size else 'off', size, cpu * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Write throughput of Quiz.submit_result versus user-data shard count
+#
+#   python benchmarks/bench_shards.py --shards 0 1 2 4 8 --writers 8 --duration 5
+#
+# Each writer process submits results for random users through the app's
+# own Database/Quiz classes. Shard count 0 is the single-file layout; 1 is a
+# single separate WAL shard, which isolates the effect of partitioning.
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import zoneinfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def writer(quiz_model, users, duration, counter):
+    rng = random.Random(os.getpid())
+    submission = [{'quiz_id': 1, 'is_correct': True}, {'quiz_id': 2, 'is_correct': False}]
+    deadline = time.monotonic() + duration
+    done = 0
+    while time.monotonic() < deadline:
+        quiz_model.submit_result(rng.randint(1, users), submission)
+        done += 1
+    with counter.get_lock():
+        counter.value += done
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--shards', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    import app as app_module
+
+    print('writers=%d users=%d duration=%.0fs' % (args.writers, args.users, args.duration))
+    for shards in args.shards:
+        db = app_module.Database(db_name='bench_%d.db' % shards, shards=shards)
+        quiz_model = app_module.Quiz(db, zoneinfo.ZoneInfo(app_module.activity.DEFAULT_TZ))
+        counter = multiprocessing.Value('i', 0)
+        procs = [multiprocessing.Process(target=writer, args=(quiz_model, args.users, args.duration, counter))
+                 for _ in range(args.writers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        print('shards=%d writes/s=%8.1f' % (shards, counter.value / args.duration))
+
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method('fork')
+    main()
@@ -0,0 +1,62 @@
+# Import-to-first-response time
+#
+#   python benchmarks/bench_startup.py --runs 10
+#
+# Each run is a fresh interpreter in a scratch directory that times
+# `import app`, then the first GET /api/topics through the test client
+# (which bootstraps the database and loads the catalog). "cold" runs start
+# without a database file, "warm" runs reuse the one the first run created.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, %r)
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/api/topics')
+assert response.status_code == 200
+done = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_response': done - imported,
+                  'total': done - start, 'jwt_loaded': 'jwt' in sys.modules}))
+'''
+
+
+def probe(cwd):
+    output = subprocess.check_output([sys.executable, '-c', PROBE % ROOT], cwd=cwd,
+                                     env=dict(os.environ, ADMISSION_CONTROL='0'))
+    return json.loads(output)
+
+
+def report(label, samples):
+    print('%-5s import=%6.1f ms first_response=%6.1f ms total=%6.1f ms jwt_imported=%s' % (
+        label,
+        statistics.median(s['import'] for s in samples) * 1000,
+        statistics.median(s['first_response'] for s in samples) * 1000,
+        statistics.median(s['total'] for s in samples) * 1000,
+        any(s['jwt_loaded'] for s in samples),
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    report('cold', [probe(tempfile.mkdtemp()) for _ in range(args.runs)])
+
+    warm_dir = tempfile.mkdtemp()
+    probe(warm_dir)
+    report('warm', [probe(warm_dir) for _ in range(args.runs)])
+
+
+if __name__ == '__main__':
+    main()
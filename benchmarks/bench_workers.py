@@ -0,0 +1,130 @@
+# Memory per worker and throughput for the pre-fork deployment (Linux)
+#
+#   python benchmarks/bench_workers.py --workers 1 2 4 8 16 --duration 5
+#
+# Starts gunicorn with gunicorn.conf.py in a scratch directory for each worker
+# count, drives it with several client processes, then reads PSS/USS of every
+# worker from /proc/<pid>/smaps_rollup. PSS splits shared (copy-on-write)
+# pages between the processes sharing them; USS is what a worker owns alone.
+# Each worker count runs with admission control off and on; the second run
+# shows how much the per-worker limits shed (429/503) under the same load.
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/topics')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start')
+
+
+def worker_pids(master_pid):
+    with open('/proc/%d/task/%d/children' % (master_pid, master_pid)) as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def memory_kb(pid):
+    values = {}
+    with open('/proc/%d/smaps_rollup' % pid) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    uss = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return values.get('Pss', 0), uss
+
+
+def client(port, threads, duration, counters):
+    deadline = time.monotonic() + duration
+    done = {}
+    lock = threading.Lock()
+
+    def loop(n):
+        i = n
+        while time.monotonic() < deadline:
+            i += 1
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', '/api/topics/%d/vocabularies' % (i % 4 + 1))
+            response = conn.getresponse()
+            response.read()
+            with lock:
+                done[response.status] = done.get(response.status, 0) + 1
+            conn.close()
+
+    pool = [threading.Thread(target=loop, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    for status, count in done.items():
+        counters.put((status, count))
+
+
+def run(workers, admission, port, duration, clients, threads):
+    env = dict(os.environ, ADMISSION_CONTROL='1' if admission else '0', WEB_CONCURRENCY=str(workers),
+               BIND='127.0.0.1:%d' % port)
+    scratch = tempfile.mkdtemp()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+         '--chdir', scratch, '--pythonpath', ROOT, '--log-level', 'warning', 'app:app'],
+        env=env,
+    )
+    try:
+        wait_for_server(port)
+        counters = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=client, args=(port, threads, duration, counters))
+                 for _ in range(clients)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        statuses = {}
+        while not counters.empty():
+            status, count = counters.get()
+            statuses[status] = statuses.get(status, 0) + count
+
+        pids = worker_pids(master.pid)
+        memory = [memory_kb(pid) for pid in pids]
+        pss = sum(m[0] for m in memory) / len(memory)
+        uss = sum(m[1] for m in memory) / len(memory)
+        print('workers=%2d admission=%-3s ok/s=%8.1f pss/worker=%7.0f kB uss/worker=%7.0f kB statuses=%s' % (
+            workers, 'on' if admission else 'off', statuses.get(200, 0) / duration, pss, uss,
+            dict(sorted(statuses.items()))))
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--clients', type=int, default=4, help='client processes')
+    parser.add_argument('--threads', type=int, default=16, help='threads per client process')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        for admission in (False, True):
+            run(workers, admission, args.port, args.duration, args.clients, args.threads)
+
+
+if __name__ == '__main__':
+    main()
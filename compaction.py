@@ -0,0 +1,173 @@
+# Retention for the results table
+#
+# Results older than the retention window are folded into results_daily
+# (one row per user/topic/day holding quiz_count, score_sum and
+# question_sum, so averages stay exact) and the raw rows are moved to an
+# archive file attached next to the database they came from, e.g.
+# english_app.db -> english_app.archive.db. Work is done in small
+# transactions so the write lock is only held for one batch at a time.
+# Archived rows keep their original id as source_id next to the id of the
+# file they came from, since a shard migration hands out ids again.
+#
+#   python compaction.py --db english_app.db --days 90
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+
+import sharding
+
+DEFAULT_RETENTION_DAYS = 90
+DEFAULT_BATCH_SIZE = 500
+
+
+def archive_path(path):
+    base, ext = os.path.splitext(path)
+    return '%s.archive%s' % (base, ext or '.db')
+
+
+def quiz_topics(db_name):
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, topic_id FROM quizzes")
+    topics = dict(cursor.fetchall())
+    conn.close()
+    return topics
+
+
+def _file_id(cursor):
+    # Random per-file identity; sharding.migrate builds new files (with new
+    # ids) so (file_id, id) never repeats even though ids alone do
+    cursor.execute("CREATE TABLE IF NOT EXISTS main.settings (key TEXT PRIMARY KEY, value TEXT)")
+    cursor.execute("INSERT OR IGNORE INTO main.settings (key, value) VALUES ('file_id', lower(hex(randomblob(8))))")
+    cursor.execute("SELECT value FROM main.settings WHERE key = 'file_id'")
+    return cursor.fetchone()[0]
+
+
+def _create_archive(cursor):
+    """Create the attached archive tables; return this file's number in the archive."""
+    cursor.execute("BEGIN IMMEDIATE")
+    # Each archive numbers the files it has seen so rows store a small integer
+    cursor.execute("CREATE TABLE IF NOT EXISTS archive.sources (id INTEGER PRIMARY KEY, file_id TEXT UNIQUE NOT NULL)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archive.results (
+            archive_id INTEGER PRIMARY KEY,
+            source_file INTEGER NOT NULL,
+            source_id INTEGER NOT NULL,
+            user_id INTEGER,
+            quiz_id INTEGER,
+            score REAL,
+            total_questions INTEGER,
+            completed_at TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS archive.idx_results_source ON results (source_file, source_id)")
+    file_id = _file_id(cursor)
+    cursor.execute("INSERT OR IGNORE INTO archive.sources (file_id) VALUES (?)", (file_id,))
+    cursor.execute("SELECT id FROM archive.sources WHERE file_id = ?", (file_id,))
+    source_file = cursor.fetchone()[0]
+    cursor.execute("COMMIT")
+    return source_file
+
+
+def compact_file(path, topics, cutoff, batch_size=DEFAULT_BATCH_SIZE, pause=0.0):
+    """Roll up and archive results in ``path`` completed before ``cutoff``; return rows moved."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("ATTACH DATABASE ? AS archive", (archive_path(path),))
+    source_file = _create_archive(cursor)
+
+    moved = 0
+    while True:
+        # Archive the batch first. Shards are in WAL mode, where SQLite
+        # commits attached files one by one, so the archive must be durable
+        # before the rows leave main. OR IGNORE keeps a re-run idempotent if
+        # a previous run died between the two transactions.
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("""
+                SELECT id, user_id, quiz_id, score, total_questions, completed_at, date(completed_at)
+                FROM main.results
+                WHERE completed_at < ? AND user_id IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+            """, (cutoff, batch_size))
+            rows = cursor.fetchall()
+            cursor.executemany("""
+                INSERT OR IGNORE INTO archive.results
+                    (source_file, source_id, user_id, quiz_id, score, total_questions, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(source_file,) + row[:6] for row in rows])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            conn.close()
+            raise
+        if not rows:
+            break
+
+        # Then roll up and delete them from main
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            rollups = {}
+            for _, user_id, quiz_id, score, total_questions, _, day in rows:
+                rollup = rollups.setdefault((user_id, topics.get(quiz_id, 0), day), [0, 0.0, 0])
+                rollup[0] += 1
+                rollup[1] += score or 0
+                rollup[2] += total_questions or 0
+
+            cursor.executemany("""
+                INSERT INTO main.results_daily (user_id, topic_id, day, quiz_count, score_sum, question_sum)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, topic_id, day) DO UPDATE SET
+                    quiz_count = quiz_count + excluded.quiz_count,
+                    score_sum = score_sum + excluded.score_sum,
+                    question_sum = question_sum + excluded.question_sum
+            """, [key + tuple(values) for key, values in rollups.items()])
+            cursor.executemany("DELETE FROM main.results WHERE id = ?", [(row[0],) for row in rows])
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            conn.close()
+            raise
+
+        moved += len(rows)
+        if pause:
+            time.sleep(pause)
+
+    conn.close()
+    return moved
+
+
+def compact(db_name, days=DEFAULT_RETENTION_DAYS, batch_size=DEFAULT_BATCH_SIZE, pause=0.0, vacuum=False):
+    cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    topics = quiz_topics(db_name)
+
+    moved = {}
+    for path in sharding.user_data_paths(db_name):
+        moved[path] = compact_file(path, topics, cutoff, batch_size, pause)
+        if vacuum:
+            conn = sqlite3.connect(path)
+            conn.execute("VACUUM")
+            conn.close()
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll up and archive old quiz results')
+    parser.add_argument('--db', default='english_app.db')
+    parser.add_argument('--days', type=int,
+                        default=int(os.environ.get('RESULTS_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between batches')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM each file afterwards (holds the lock)')
+    args = parser.parse_args()
+
+    moved = compact(args.db, args.days, args.batch_size, args.pause, args.vacuum)
+    for path, count in moved.items():
+        print('%s: %d results rolled up into %s' % (path, count, archive_path(path)))
+
+
+if __name__ == '__main__':
+    main()
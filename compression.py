@@ -0,0 +1,116 @@
+from collections import OrderedDict
+import gzip
+import threading
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Response compression with cached precompressed variants
+#
+# Catalog responses only change when the catalog version does, so each
+# (cache key, encoding) pair is compressed once, at a high level, and then
+# served from memory until the key changes.
+def _compressors():
+    compressors = {'gzip': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=9)
+    if zstandard is not None:
+        compressors['zstd'] = lambda data: zstandard.ZstdCompressor(level=12).compress(data)
+    return compressors
+
+COMPRESSORS = _compressors()
+
+# Preferred order when the client accepts several encodings equally
+PREFERENCE = ('zstd', 'br', 'gzip')
+
+
+def negotiate(accept_encoding):
+    """Pick the best supported encoding from an Accept-Encoding header, or None."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in COMPRESSORS:
+            continue
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionCache:
+    """LRU of encoded bodies keyed on (cache key, encoding); None is the identity body."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, encoding, build):
+        entry_key = (key, encoding)
+        with self._lock:
+            body = self._entries.get(entry_key)
+            if body is not None:
+                self._entries.move_to_end(entry_key)
+                return body
+
+        if encoding is None:
+            body = build()
+        else:
+            body = COMPRESSORS[encoding](self.get(key, None, build))
+
+        with self._lock:
+            self._entries[entry_key] = body
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def init_app(self, app):
+        app.extensions['compression'] = self
+
+
+def compressed_json(cache_key, load):
+    """JSON response for ``load()``, cached under ``cache_key`` and compressed when worthwhile.
+
+    ``cache_key`` must change whenever the data does (e.g. include the
+    catalog version); ``load`` is only called on a cache miss.
+    """
+    cache = current_app.extensions['compression']
+    build = lambda: current_app.json.response(load()).get_data()
+    body = cache.get(cache_key, None, build)
+
+    encoding = None
+    if len(body) >= current_app.config['COMPRESS_MIN_SIZE']:
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is not None:
+            body = cache.get(cache_key, encoding, build)
+
+    response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response
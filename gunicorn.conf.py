@@ -0,0 +1,35 @@
+# Pre-fork deployment: gunicorn -c gunicorn.conf.py app:app
+#
+# The master imports the app, bootstraps the database and loads the catalog
+# once; workers then share the loaded catalog copy-on-write. Each worker
+# notices catalog edits through Catalog.refresh().
+#
+# Workers are threaded (gthread) so each handles up to `threads` requests at
+# once. Admission control is per process: the app sizes its route-class
+# concurrency limits from the same WEB_THREADS value, and per-user/IP token
+# buckets allow their rate in every worker, i.e. WEB_CONCURRENCY times the
+# configured rate overall.
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', '16'))
+preload_app = True
+
+
+def when_ready(server):
+    from app import app, get_models
+    with app.app_context():
+        get_models().db.catalog
+    # Move everything loaded so far into the permanent generation so the
+    # cyclic GC in workers does not touch (and copy) the shared pages
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    from app import app, get_models
+    with app.app_context():
+        get_models().db.catalog.close()
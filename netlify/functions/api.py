@@ -2,10 +2,90 @@
 import json
 import sqlite3
 import hashlib
-import jwt
 import datetime
 from urllib.parse import parse_qs
 import os
+import base64
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Response compression (same encodings, levels and negotiation as
+# compression.py in the main app, which this function cannot import)
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_CACHE_SIZE = 256
+# (sha1 of body, encoding) -> compressed bytes, kept while the container is warm
+compressed_cache = {}
+
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, 9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=9)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = lambda data: zstandard.ZstdCompressor(level=12).compress(data)
+
+# Preferred order when the client accepts several encodings equally
+PREFERENCE = ('zstd', 'br', 'gzip')
+
+def negotiate_encoding(accept_encoding):
+    """Highest-q supported encoding from an Accept-Encoding header, ties broken by PREFERENCE."""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    
+    wildcard = weights.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in PREFERENCE:
+        if encoding not in COMPRESSORS:
+            continue
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_response(response, request_headers):
+    # Vary on every response so a shared cache never serves the identity
+    # body to clients that accept compression (or the reverse)
+    response = dict(response, headers=dict(response['headers'], Vary='Accept-Encoding'))
+    body = response['body'].encode('utf-8')
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    
+    encoding = negotiate_encoding(request_headers.get('accept-encoding'))
+    if encoding is None:
+        return response
+    
+    key = (hashlib.sha1(body).digest(), encoding)
+    compressed = compressed_cache.get(key)
+    if compressed is None:
+        compressed = COMPRESSORS[encoding](body)
+        if len(compressed_cache) >= COMPRESS_CACHE_SIZE:
+            compressed_cache.clear()
+        compressed_cache[key] = compressed
+    
+    return {
+        'statusCode': response['statusCode'],
+        'headers': dict(response['headers'], **{'Content-Encoding': encoding}),
+        'body': base64.b64encode(compressed).decode('ascii'),
+        'isBase64Encoded': True
+    }
 
 # Database setup for Netlify
 def get_db_connection():
@@ -179,13 +259,13 @@ def handler(event, context):
         elif path == '/register' and method == 'POST':
             return register_handler(body, headers)
         elif path == '/topics' and method == 'GET':
-            return topics_handler(headers)
+            return compress_response(topics_handler(headers), event.get('headers', {}))
         elif path.startswith('/topics/') and path.endswith('/vocabularies') and method == 'GET':
             topic_id = path.split('/')[2]
-            return vocabularies_handler(topic_id, headers)
+            return compress_response(vocabularies_handler(topic_id, headers), event.get('headers', {}))
         elif path.startswith('/topics/') and path.endswith('/quiz') and method == 'GET':
             topic_id = path.split('/')[2]
-            return quiz_handler(topic_id, headers)
+            return compress_response(quiz_handler(topic_id, headers), event.get('headers', {}))
         elif path == '/quiz/submit' and method == 'POST':
             return submit_quiz_handler(body, event.get('headers', {}), headers)
         elif path == '/progress' and method == 'GET':
@@ -218,6 +298,7 @@ def login_handler(body, headers):
     conn.close()
     
     if user:
+        import jwt
         token = jwt.encode({
             'user_id': user[0],
             'username': user[1],
@@ -287,7 +368,7 @@ def topics_handler(headers):
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(result)
+        'body': json.dumps(result, ensure_ascii=False)
     }
 
 def vocabularies_handler(topic_id, headers):
@@ -309,7 +390,7 @@ def vocabularies_handler(topic_id, headers):
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(result)
+        'body': json.dumps(result, ensure_ascii=False)
     }
 
 def quiz_handler(topic_id, headers):
@@ -335,7 +416,7 @@ def quiz_handler(topic_id, headers):
     return {
         'statusCode': 200,
         'headers': headers,
-        'body': json.dumps(result)
+        'body': json.dumps(result, ensure_ascii=False)
     }
 
 def submit_quiz_handler(body, request_headers, headers):
@@ -350,6 +431,7 @@ def submit_quiz_handler(body, request_headers, headers):
     
     token = auth_header[7:]
     try:
+        import jwt
         payload = jwt.decode(token, 'your-secret-key-here', algorithms=['HS256'])
         user_id = payload['user_id']
     except:
@@ -396,6 +478,7 @@ def progress_handler(request_headers, headers):
     
     token = auth_header[7:]
     try:
+        import jwt
         payload = jwt.decode(token, 'your-secret-key-here', algorithms=['HS256'])
         user_id = payload['user_id']
     except:
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from functools import wraps
+import math
+import threading
+import time
+
+from flask import current_app, jsonify
+
+
+# Admission control (token buckets + bounded concurrency per route class)
+class TokenBucket:
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, capacity, now):
+        self.tokens = capacity
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Keyed token buckets with LRU idle eviction.
+
+    Each active key costs one small bucket object. A bucket idle for
+    longer than ``capacity / rate`` seconds is full again, so evicting it
+    after ``idle_timeout`` loses nothing.
+    """
+
+    def __init__(self, rate, capacity, idle_timeout=None, max_keys=10000):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.idle_timeout = max(idle_timeout or 0, self.capacity / self.rate)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, cost=1.0):
+        """Take ``cost`` tokens for ``key``; return seconds to wait, or 0 if allowed."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.capacity, now)
+                self._buckets[key] = bucket
+            else:
+                self._buckets.move_to_end(key)
+                elapsed = now - bucket.updated_at
+                bucket.tokens = min(self.capacity, bucket.tokens + elapsed * self.rate)
+                bucket.updated_at = now
+            self._evict(now)
+
+            if bucket.tokens >= cost:
+                bucket.tokens -= cost
+                return 0
+            return (cost - bucket.tokens) / self.rate
+
+    def _evict(self, now):
+        # Least recently used keys sit at the front of the OrderedDict
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if len(buckets) <= self.max_keys and now - bucket.updated_at < self.idle_timeout:
+                break
+            del buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """Bounded number of in-flight requests plus a short bounded wait queue."""
+
+    def __init__(self, limit, queue_size=0, queue_timeout=0.0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._waiting = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._lock:
+            if self._waiting >= self.queue_size:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self):
+        self._slots.release()
+
+
+class AdmissionController:
+    """Rejects excess traffic early with 429 (rate) or 503 (overload).
+
+    ``key_func`` returns ``('user', user_id)`` for authenticated requests
+    and ``('ip', address)`` otherwise; each kind has its own buckets.
+    ``route_classes`` maps a class name to ``(limit, queue_size, queue_timeout)``.
+    """
+
+    def __init__(self, key_func, route_classes, user_rate=5, user_burst=20,
+                 ip_rate=10, ip_burst=40, retry_after=1):
+        self.key_func = key_func
+        self.enabled = True
+        self.retry_after = retry_after
+        self.limiters = {
+            'user': RateLimiter(user_rate, user_burst),
+            'ip': RateLimiter(ip_rate, ip_burst),
+        }
+        self.pools = {
+            name: ConcurrencyLimiter(*spec) for name, spec in route_classes.items()
+        }
+
+    def init_app(self, app):
+        app.extensions['admission'] = self
+
+    def call(self, route_class, f, *args, **kwargs):
+        if not self.enabled:
+            return f(*args, **kwargs)
+
+        kind, key = self.key_func()
+        wait = self.limiters[kind].hit(key)
+        if wait:
+            return self._reject(429, 'Too many requests', wait)
+
+        pool = self.pools[route_class]
+        if not pool.acquire():
+            return self._reject(503, 'Server is busy, please retry', self.retry_after)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            pool.release()
+
+    def _reject(self, status, message, retry_after):
+        response = jsonify({'message': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+def admit(route_class):
+    """Route decorator; uses the AdmissionController registered on the current app."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            return current_app.extensions['admission'].call(route_class, f, *args, **kwargs)
+        return decorated
+    return decorator
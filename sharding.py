@@ -0,0 +1,286 @@
+# User-data sharding: progress and results partitioned by user_id
+#
+# The main database file keeps users and the read-mostly catalog. With
+# N > 0 shards, progress and results live in english_app.s<N>-<i>.db files
+# next to it, picked by shard_index(user_id). The shard count in use is
+# recorded in the main file's settings table so a mismatched configuration
+# is caught at startup instead of silently splitting a user's history.
+# Because file names include the layout, that settings row is also the one
+# switch a migration flips: files of any other layout are never read.
+#
+# Archive files written by compaction.py stay with the file they came from;
+# they are cold history and are not read by the app.
+#
+# Migrate or rebalance (stop the app first):
+#   python sharding.py --db english_app.db --shards 4
+import argparse
+import os
+import re
+import sqlite3
+
+USER_DATA_TABLES = {
+    'progress': '''
+        CREATE TABLE IF NOT EXISTS progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            vocab_id INTEGER,
+            status TEXT DEFAULT 'not_learned',
+            score INTEGER DEFAULT 0,
+            last_reviewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'results': '''
+        CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            quiz_id INTEGER,
+            score REAL,
+            total_questions INTEGER,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'results_daily': '''
+        CREATE TABLE IF NOT EXISTS results_daily (
+            user_id INTEGER NOT NULL,
+            topic_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            quiz_count INTEGER NOT NULL,
+            score_sum REAL NOT NULL,
+            question_sum INTEGER NOT NULL,
+            PRIMARY KEY (user_id, topic_id, day)
+        ) WITHOUT ROWID
+    ''',
+    'activity': '''
+        CREATE TABLE IF NOT EXISTS activity (
+            user_id INTEGER PRIMARY KEY,
+            start_day INTEGER NOT NULL,
+            bits BLOB NOT NULL
+        )
+    ''',
+}
+
+# Columns copied on migration; ids are reassigned by the target shard
+USER_DATA_COLUMNS = {
+    'progress': ('user_id', 'vocab_id', 'status', 'score', 'last_reviewed'),
+    'results': ('user_id', 'quiz_id', 'score', 'total_questions', 'completed_at'),
+    'results_daily': ('user_id', 'topic_id', 'day', 'quiz_count', 'score_sum', 'question_sum'),
+    'activity': ('user_id', 'start_day', 'bits'),
+}
+
+BATCH_SIZE = 5000
+
+
+class ShardLayoutError(Exception):
+    pass
+
+
+def shard_index(user_id, shards):
+    return int(user_id) % shards
+
+
+def shard_path(db_name, index, shards):
+    base, ext = os.path.splitext(db_name)
+    return '%s.s%d-%d%s' % (base, shards, index, ext or '.db')
+
+
+def layout_paths(db_name, shards):
+    return [shard_path(db_name, i, shards) for i in range(shards)]
+
+
+def _shard_files(db_name):
+    """Yield ``(layout, path)`` for every shard file (and -wal/-shm) next to ``db_name``."""
+    base, ext = os.path.splitext(db_name)
+    directory = os.path.dirname(base) or '.'
+    pattern = re.compile(r'^%s\.s(\d+)-\d+%s(-wal|-shm)?$' % (
+        re.escape(os.path.basename(base)), re.escape(ext or '.db')))
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            yield int(match.group(1)), os.path.join(directory, name)
+
+
+def init_shard(path):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    # WAL lets readers of a shard proceed while one writer holds its lock
+    cursor.execute("PRAGMA journal_mode=WAL")
+    for ddl in USER_DATA_TABLES.values():
+        cursor.execute(ddl)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_progress_user ON progress (user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_user ON results (user_id)")
+    conn.commit()
+    conn.close()
+
+
+def user_data_paths(db_name):
+    """Files holding progress/results for the layout recorded in ``db_name``."""
+    conn = sqlite3.connect(db_name)
+    shards = read_layout(conn) or 0
+    conn.close()
+    if not shards:
+        return [db_name]
+    return layout_paths(db_name, shards)
+
+
+def read_layout(conn):
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+    cursor.execute("SELECT value FROM settings WHERE key = 'user_data_shards'")
+    row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+def write_layout(conn, shards):
+    conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('user_data_shards', ?)", (str(shards),))
+
+
+def check_layout(conn, shards, db_name):
+    """Record the shard count on first use, refuse to start on a mismatch."""
+    recorded = read_layout(conn)
+    if recorded is None:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM progress) + (SELECT COUNT(*) FROM results)
+                 + (SELECT COUNT(*) FROM results_daily)
+        """)
+        recorded = shards if cursor.fetchone()[0] == 0 else 0
+        write_layout(conn, recorded)
+        conn.commit()
+
+    if recorded != shards:
+        raise ShardLayoutError(
+            'Database uses %d user-data shards but %d were configured; '
+            'run: python sharding.py --db %s --shards %d' % (recorded, shards, db_name, shards))
+
+
+def _remove_database_file(path):
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def _remove_other_layouts(db_name, keep):
+    for layout, path in list(_shard_files(db_name)):
+        if layout not in keep:
+            os.remove(path)
+
+
+def migrate(db_name, shards):
+    """Move progress/results from the recorded layout to ``shards`` shards.
+
+    Rows are copied and counted into files (or, for ``shards=0``, staging
+    tables in the main file) that the recorded layout does not use. The
+    settings row is only rewritten once that copy is complete, in the same
+    transaction that moves staged rows into place, so a crash at any point
+    leaves either the old layout or the new one intact and a rerun picks up
+    from there. Files of the old layout are removed after the switch.
+    """
+    main = sqlite3.connect(db_name, isolation_level=None)
+    old = read_layout(main) or 0
+    # Leftovers from an interrupted run are never the live copy
+    _remove_other_layouts(db_name, {old})
+    if old == shards:
+        main.close()
+        return {}
+
+    # Files from an older schema only gain new tables (e.g. activity) when
+    # the app boots; create them so every table can be copied
+    for ddl in USER_DATA_TABLES.values():
+        main.execute(ddl)
+    if old:
+        for path in layout_paths(db_name, old):
+            init_shard(path)
+        sources = [sqlite3.connect(path) for path in layout_paths(db_name, old)]
+    else:
+        sources = [main]
+
+    if shards:
+        for path in layout_paths(db_name, shards):
+            init_shard(path)
+        targets = [sqlite3.connect(path, isolation_level=None) for path in layout_paths(db_name, shards)]
+        staging = dict((table, table) for table in USER_DATA_COLUMNS)
+    else:
+        targets = [main]
+        staging = dict((table, '_migrate_%s' % table) for table in USER_DATA_COLUMNS)
+        for table, stage in staging.items():
+            main.execute("DROP TABLE IF EXISTS %s" % stage)
+            main.execute("CREATE TABLE %s AS SELECT %s FROM %s WHERE 0" % (
+                stage, ', '.join(USER_DATA_COLUMNS[table]), table))
+
+    moved = {}
+    for table, columns in USER_DATA_COLUMNS.items():
+        select = "SELECT %s FROM %s" % (', '.join(columns), table)
+        insert = "INSERT INTO %s (%s) VALUES (%s)" % (
+            staging[table], ', '.join(columns), ', '.join('?' * len(columns)))
+        expected = 0
+        for target in targets:
+            target.execute("BEGIN")
+        for source in sources:
+            cursor = source.execute(select)
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                expected += len(rows)
+                batches = {}
+                for row in rows:
+                    # Rows without a user (the schema allows it) go to shard 0
+                    index = shard_index(row[0], shards) if shards and row[0] is not None else 0
+                    batches.setdefault(index, []).append(row)
+                for index, batch in batches.items():
+                    targets[index].executemany(insert, batch)
+
+        copied = 0
+        for target in targets:
+            target.execute("COMMIT")
+            copied += target.execute("SELECT COUNT(*) FROM %s" % staging[table]).fetchone()[0]
+        if copied != expected:
+            raise ShardLayoutError('%s: copied %d rows, expected %d' % (table, copied, expected))
+        moved[table] = copied
+
+    for source in sources:
+        if source is not main:
+            source.close()
+    for target in targets:
+        if target is not main:
+            target.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            target.close()
+
+    # Switch layouts in one transaction
+    main.execute("BEGIN IMMEDIATE")
+    try:
+        if not old:
+            for table in USER_DATA_COLUMNS:
+                main.execute("DELETE FROM %s" % table)
+        if not shards:
+            for table, columns in USER_DATA_COLUMNS.items():
+                main.execute("INSERT INTO %s (%s) SELECT %s FROM %s" % (
+                    table, ', '.join(columns), ', '.join(columns), staging[table]))
+                main.execute("DROP TABLE %s" % staging[table])
+        write_layout(main, shards)
+        main.execute("COMMIT")
+    except Exception:
+        main.execute("ROLLBACK")
+        main.close()
+        raise
+    main.close()
+
+    _remove_other_layouts(db_name, {shards})
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate progress/results between user-data shard layouts')
+    parser.add_argument('--db', default='english_app.db')
+    parser.add_argument('--shards', type=int, required=True, help='target shard count (0 = single file)')
+    args = parser.parse_args()
+
+    moved = migrate(args.db, args.shards)
+    if not moved:
+        print('Already using %d shards' % args.shards)
+    for table, count in moved.items():
+        print('%s: %d rows -> %d shards' % (table, count, args.shards))
+
+
+if __name__ == '__main__':
+    main()
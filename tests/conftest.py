@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as app_module
+
+
+@pytest.fixture
+def db_name(tmp_path):
+    """A single-file database with schema and sample data in a scratch directory."""
+    db_name = str(tmp_path / 'english_app.db')
+    app_module.Database(db_name)
+    return db_name
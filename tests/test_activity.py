@@ -0,0 +1,26 @@
+import datetime
+import sqlite3
+import zoneinfo
+
+import activity
+
+TZ = zoneinfo.ZoneInfo(activity.DEFAULT_TZ)
+
+
+def test_local_day_uses_time_zone():
+    # 23:30 UTC on May 1st is 06:30 on May 2nd in Vietnam
+    assert activity.local_day('2024-05-01 23:30:00', TZ) == activity.day_number(datetime.date(2024, 5, 2))
+    assert activity.local_day('2024-05-01 16:59:59', TZ) == activity.day_number(datetime.date(2024, 5, 1))
+
+
+def test_backfill_counts_local_days(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.executemany("INSERT INTO results (user_id, quiz_id, score, total_questions, completed_at) VALUES (1, 1, 8, 10, ?)",
+                     [('2024-05-01 10:00:00',), ('2024-05-01 23:30:00',)])
+    conn.commit()
+
+    assert activity.backfill_file(db_name, TZ) == 1
+    start_day, bits = conn.execute("SELECT start_day, bits FROM activity WHERE user_id = 1").fetchone()
+    summary = activity.summarize(start_day, bits, activity.day_number(datetime.date(2024, 5, 2)))
+    assert summary['heatmap'] == ['2024-05-01', '2024-05-02']
+    conn.close()
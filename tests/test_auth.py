@@ -0,0 +1,26 @@
+import jwt
+
+import app as app_module
+
+
+def test_token_is_decoded_once_per_request(db_name, monkeypatch):
+    client = app_module.create_app({'DATABASE': db_name}).test_client()
+    token = client.post('/api/login', json={'username': 'admin', 'password': 'admin123'}).get_json()['token']
+
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(jwt, 'decode', lambda *args, **kwargs: calls.append(1) or decode(*args, **kwargs))
+    response = client.get('/api/progress', headers={'Authorization': 'Bearer ' + token})
+    assert response.status_code == 200
+    assert len(calls) == 1
+
+
+def test_missing_and_invalid_tokens(db_name):
+    client = app_module.create_app({'DATABASE': db_name}).test_client()
+    response = client.get('/api/progress')
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Token is missing'
+
+    response = client.get('/api/progress', headers={'Authorization': 'Bearer nope'})
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Token is invalid'
@@ -0,0 +1,48 @@
+import sqlite3
+
+import app as app_module
+
+
+def edit(db_name, query, params=()):
+    # Another process's connection
+    conn = sqlite3.connect(db_name)
+    conn.execute(query, params)
+    conn.commit()
+    conn.close()
+
+
+def test_refresh_reloads_only_edited_topic(db_name, monkeypatch):
+    catalog = app_module.Catalog(app_module.Database(db_name), poll_interval=0)
+    reloaded = []
+    reload_topics = catalog._reload_topics
+    monkeypatch.setattr(catalog, '_reload_topics',
+                        lambda cursor, topic_ids: reloaded.append(set(topic_ids)) or reload_topics(cursor, topic_ids))
+    catalog.refresh()
+    assert reloaded == []
+
+    word = catalog.vocabularies[1][0]
+    other = catalog.vocabularies[2]
+    edit(db_name, "UPDATE vocabularies SET meaning = ? WHERE id = ?", ('đã sửa', word['id']))
+    catalog.refresh()
+
+    assert reloaded == [{1}]
+    assert catalog.vocabularies[1][0]['meaning'] == 'đã sửa'
+    assert catalog.vocabularies[2] is other
+    catalog.close()
+
+
+def test_null_topic_does_not_add_version_row(db_name):
+    conn = sqlite3.connect(db_name)
+    before = dict(conn.execute("SELECT topic_id, version FROM catalog_versions"))
+    word_id = conn.execute("SELECT id FROM vocabularies WHERE topic_id = 1").fetchone()[0]
+    conn.close()
+
+    edit(db_name, "UPDATE vocabularies SET topic_id = NULL WHERE id = ?", (word_id,))
+    edit(db_name, "INSERT INTO quizzes (topic_id, question, option_a, option_b, option_c, option_d, correct_answer) "
+                  "VALUES (NULL, 'Q?', 'a', 'b', 'c', 'd', 'A')")
+
+    conn = sqlite3.connect(db_name)
+    after = dict(conn.execute("SELECT topic_id, version FROM catalog_versions"))
+    conn.close()
+    assert set(after) == set(before)
+    assert after[1] == before.get(1, 0) + 1
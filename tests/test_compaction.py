@@ -0,0 +1,75 @@
+import os
+import sqlite3
+
+import pytest
+
+import compaction
+import sharding
+
+OLD = '2020-01-01 10:00:00'
+
+
+def add_results(db_name, users):
+    paths = sharding.user_data_paths(db_name)
+    for user_id in users:
+        conn = sqlite3.connect(paths[sharding.shard_index(user_id, len(paths))])
+        conn.execute("INSERT INTO results (user_id, quiz_id, score, total_questions, completed_at) VALUES (?, 1, 8, 10, ?)",
+                     (user_id, OLD))
+        conn.commit()
+        conn.close()
+
+
+def count(paths, query):
+    total = 0
+    for path in paths:
+        if os.path.exists(path):
+            conn = sqlite3.connect(path)
+            total += conn.execute(query).fetchone()[0]
+            conn.close()
+    return total
+
+
+def archived(db_name):
+    directory = os.path.dirname(db_name)
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.archive.db')]
+    return count(paths, "SELECT COUNT(*) FROM results")
+
+
+def test_compact_after_migrations_keeps_every_row(db_name):
+    add_results(db_name, range(1, 21))
+    sharding.migrate(db_name, 2)
+    compaction.compact(db_name)
+
+    # Back to two shards: fresh files whose ids restart at 1, next to the
+    # archives written by the first compaction
+    sharding.migrate(db_name, 3)
+    sharding.migrate(db_name, 2)
+    add_results(db_name, range(1, 5))
+    compaction.compact(db_name)
+
+    paths = sharding.user_data_paths(db_name)
+    assert archived(db_name) == 24
+    assert count(paths, "SELECT COUNT(*) FROM results") == 0
+    assert count(paths, "SELECT SUM(quiz_count) FROM results_daily") == 24
+
+
+class CrashingTopics(dict):
+    # Fails while rolling up, i.e. after the archive batch has committed
+    def get(self, key, default=None):
+        raise RuntimeError('crash')
+
+
+def test_crash_before_main_commits_keeps_rows(db_name):
+    add_results(db_name, range(1, 6))
+    cutoff = '2021-01-01 00:00:00'
+
+    with pytest.raises(RuntimeError):
+        compaction.compact_file(db_name, CrashingTopics(), cutoff)
+    assert archived(db_name) == 5
+    assert count([db_name], "SELECT COUNT(*) FROM results") == 5
+    assert count([db_name], "SELECT COUNT(*) FROM results_daily") == 0
+
+    assert compaction.compact_file(db_name, compaction.quiz_topics(db_name), cutoff) == 5
+    assert archived(db_name) == 5
+    assert count([db_name], "SELECT COUNT(*) FROM results") == 0
+    assert count([db_name], "SELECT SUM(quiz_count) FROM results_daily") == 5
@@ -0,0 +1,40 @@
+import importlib.util
+import os
+
+import pytest
+
+import compression
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def netlify_api():
+    spec = importlib.util.spec_from_file_location('netlify_api', os.path.join(ROOT, 'netlify', 'functions', 'api.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('accept_encoding', [
+    None, '', 'identity', 'gzip', 'br', 'zstd', 'gzip, br', 'gzip, br, zstd',
+    'br;q=0.1, gzip', 'zstd;q=0.5, br;q=0.9', '*', '*;q=0', 'gzip;q=0', 'gzip;q=0, *;q=0.2',
+    'br;q=0', 'GZIP', 'gzip;q=bad',
+])
+def test_netlify_negotiation_matches_app(netlify_api, accept_encoding):
+    assert netlify_api.negotiate_encoding(accept_encoding) == compression.negotiate(accept_encoding)
+
+
+def test_negotiation_prefers_higher_q():
+    assert compression.negotiate('br;q=0.1, gzip') == 'gzip'
+    assert compression.negotiate('*;q=0') is None
+    assert compression.negotiate('gzip;q=0') is None
+
+
+def test_netlify_responses_always_vary(netlify_api):
+    small = {'statusCode': 200, 'headers': {'Content-Type': 'application/json'}, 'body': '{}'}
+    large = dict(small, body='{"words": "%s"}' % ('x' * 4096))
+    for response, accept_encoding in ((small, 'gzip'), (large, 'identity'), (large, 'gzip')):
+        result = netlify_api.compress_response(response, {'accept-encoding': accept_encoding})
+        assert result['headers']['Vary'] == 'Accept-Encoding'
+    assert 'Vary' not in small['headers']
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+import rate_limit
+from rate_limit import AdmissionController, ConcurrencyLimiter, RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_burst_then_wait(clock):
+    limiter = RateLimiter(rate=2, capacity=4)
+    assert [limiter.hit('a') for _ in range(4)] == [0, 0, 0, 0]
+    assert limiter.hit('a') == pytest.approx(0.5)
+
+
+def test_refill(clock):
+    limiter = RateLimiter(rate=2, capacity=4)
+    for _ in range(4):
+        limiter.hit('a')
+    clock[0] += 0.25
+    assert limiter.hit('a') == pytest.approx(0.25)
+    clock[0] += 0.25
+    assert limiter.hit('a') == 0
+
+    # Refill stops at capacity
+    clock[0] += 100
+    assert [limiter.hit('a') for _ in range(4)] == [0, 0, 0, 0]
+    assert limiter.hit('a') > 0
+
+
+def test_idle_keys_are_evicted(clock):
+    # idle_timeout is at least capacity / rate = 2 seconds
+    limiter = RateLimiter(rate=2, capacity=4, idle_timeout=1)
+    limiter.hit('a')
+    clock[0] += 1.5
+    limiter.hit('b')
+    assert len(limiter) == 2
+    clock[0] += 1
+    limiter.hit('c')
+    assert len(limiter) == 2
+    assert 'a' not in limiter._buckets
+
+
+def test_max_keys_evicts_least_recently_used(clock):
+    limiter = RateLimiter(rate=1, capacity=1, max_keys=2)
+    limiter.hit('a')
+    limiter.hit('b')
+    limiter.hit('a')
+    limiter.hit('c')
+    assert list(limiter._buckets) == ['a', 'c']
+
+
+def test_concurrency_rejects_when_queue_full():
+    limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=5)
+    assert limiter.acquire()
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while limiter._waiting == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    start = time.monotonic()
+    assert not limiter.acquire()
+    assert time.monotonic() - start < 0.5
+
+    limiter.release()
+    waiter.join()
+    assert results == [True]
+    limiter.release()
+
+
+def test_concurrency_waits_up_to_queue_timeout():
+    limiter = ConcurrencyLimiter(1, queue_size=1, queue_timeout=0.1)
+    assert limiter.acquire()
+    start = time.monotonic()
+    assert not limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+    limiter.release()
+
+
+def test_retry_after(clock):
+    app = Flask(__name__)
+    admission = AdmissionController(lambda: ('ip', '10.0.0.1'), {'read': (1, 0, 0)},
+                                    ip_rate=0.4, ip_burst=1, retry_after=3)
+    view = lambda: 'ok'
+    with app.test_request_context():
+        assert admission.call('read', view) == 'ok'
+
+        response = admission.call('read', view)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '3'  # ceil(1 / 0.4)
+
+        clock[0] += 2.45
+        response = admission.call('read', view)
+        assert response.headers['Retry-After'] == '1'  # waits under a second round up to 1
+
+        clock[0] += 10
+        assert admission.pools['read'].acquire()
+        response = admission.call('read', view)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '3'
+        admission.pools['read'].release()
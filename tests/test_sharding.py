@@ -0,0 +1,37 @@
+import sqlite3
+
+import sharding
+
+
+def test_migrate_files_without_activity_table(db_name):
+    sharding.migrate(db_name, 2)
+
+    # Shards and main file as created at schema version 1
+    for path in [db_name] + sharding.layout_paths(db_name, 2):
+        conn = sqlite3.connect(path)
+        conn.execute("DROP TABLE IF EXISTS activity")
+        conn.commit()
+        conn.close()
+    conn = sqlite3.connect(sharding.shard_path(db_name, 1, 2))
+    conn.execute("INSERT INTO results (user_id, quiz_id, score, total_questions) VALUES (1, 1, 8, 10)")
+    conn.commit()
+    conn.close()
+
+    assert sharding.migrate(db_name, 3)['results'] == 1
+    assert sharding.migrate(db_name, 0)['results'] == 1
+    assert sharding.user_data_paths(db_name) == [db_name]
+
+
+def test_migrate_keeps_rows_without_user(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.execute("INSERT INTO progress (user_id, vocab_id) VALUES (NULL, 1)")
+    conn.execute("INSERT INTO results (user_id, quiz_id, score, total_questions) VALUES (NULL, 1, 8, 10)")
+    conn.commit()
+    conn.close()
+
+    moved = sharding.migrate(db_name, 3)
+    assert moved['progress'] == 1 and moved['results'] == 1
+    conn = sqlite3.connect(sharding.shard_path(db_name, 0, 3))
+    assert conn.execute("SELECT COUNT(*) FROM progress WHERE user_id IS NULL").fetchone()[0] == 1
+    conn.close()
+    assert sharding.migrate(db_name, 0)['results'] == 1